@@ -0,0 +1,21 @@
+# cython: language_level=3
+"""Cython implementation of the table-driven page normalization loop.
+
+Compiled only when Cython is available (pip install freshsalessdk[fast]);
+_normalize_batch falls back to the pure-Python loop otherwise.
+"""
+
+
+def normalize_page(list objs, tuple normalize_map, dict index):
+    cdef dict obj, idx
+    cdef str id_key, out_key, container_key
+    for id_key, out_key, container_key in normalize_map:
+        idx = index.get(container_key)
+        if idx is not None:
+            for obj in objs:
+                if id_key in obj:
+                    obj[out_key] = idx.get(obj[id_key])
+        else:
+            for obj in objs:
+                if id_key in obj:
+                    obj[out_key] = None
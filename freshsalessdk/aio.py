@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+from .freshsalessdk import (_APICore, _ContactsMixin, _AccountsMixin,
+                            _DealsMixin, _LeadsMixin, _loads)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIBase(_APICore):
+    """Asyncio counterpart of APIBase, transported over a shared
+    httpx.AsyncClient. HTTP/2 multiplexing carries all concurrent page
+    fetches over a single connection. Normalization and param handling come
+    from the shared core, so no requests.Session is ever created here.
+    """
+
+    __slots__ = ('_client',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=50),
+            headers={'Authorization': f'Token token={self.api_key}'}
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def _aget_generic(self, path, params=None):
+        if not path.startswith('/'):
+            raise ValueError(f'path must start with "/": {path!r}')
+        api_params = self._build_params(params)
+        api_path = self._base_url + path
+        logger.debug('calling get %s passing params %s', api_path, api_params)
+        response = await self._client.get(api_path, params=api_params)
+        response.raise_for_status()
+        return _loads(response.content)
+
+    async def _aget_page(self, view_id, page):
+        # only pay for the timing syscalls when debug logging is enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            start_time = time.time()
+        res = await self._aget_generic(
+            path=f'/{self.resource_type}/view/{view_id}', params={'page': page})
+        if debug:
+            logger.debug('got page %s of %s in %s seconds',
+                         page, res['meta']['total_pages'], time.time()-start_time)
+        self._build_index(res)
+        return res
+
+    async def get_views(self):
+        if self._views_cache and time.monotonic() < self._views_cache[1]:
+            return self._views_cache[0]
+        res = await self._aget_generic(path=f'/{self.resource_type}/filters')
+        views = res['filters']
+        self._views_cache = (views, time.monotonic() + self.metadata_ttl)
+        return views
+
+    async def get_all_generator(self, view_id, limit=None):
+        # same shape as the threaded sync version: page 1 first, then all
+        # remaining pages in flight at once, consumed in page order
+        num = 0
+        res = await self._aget_page(view_id=view_id, page=1)
+        total_pages = res['meta']['total_pages']
+        pending = [asyncio.ensure_future(self._aget_page(view_id, page))
+                   for page in range(2, total_pages + 1)]
+        try:
+            while True:
+                objs = res[self.resource_type]
+                self._normalize_batch(objs, container=res)
+                for obj in objs:
+                    num = num + 1
+                    if limit and num > limit:
+                        return
+                    yield obj
+
+                if not pending:
+                    break
+                res = await pending.pop(0)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_all(self, view_id, limit=None):
+        return [obj async for obj
+                in self.get_all_generator(view_id=view_id, limit=limit)]
+
+    async def get(self, id):
+        res = await self._aget_generic(path=f'/{self.resource_type}/{id}')
+        self._build_index(res)
+        v = res[self.resource_type_singular]
+        self._normalize_batch([v], container=res)
+        return v
+
+
+class AsyncContacts(_ContactsMixin, AsyncAPIBase):
+    __slots__ = ()
+
+    async def get_activities(self, id):
+        res = await self._aget_generic(f'/contacts/{id}/activities')
+        return res['activities']
+
+    async def get_appointments(self, id):
+        res = await self._aget_generic(f'/contacts/{id}/appointments')
+        return res['appointments']
+
+
+class AsyncAccounts(_AccountsMixin, AsyncAPIBase):
+    __slots__ = ()
+
+
+class AsyncDeals(_DealsMixin, AsyncAPIBase):
+    __slots__ = ()
+
+
+class AsyncLeads(_LeadsMixin, AsyncAPIBase):
+    __slots__ = ()
+
+
+class AsyncFreshsalesSDK:
+    __slots__ = ('contacts', 'accounts', 'deals', 'leads')
+
+    def __init__(self, domain, api_key):
+        self.contacts = AsyncContacts(domain=domain, api_key=api_key)
+        self.accounts = AsyncAccounts(domain=domain, api_key=api_key)
+        self.deals = AsyncDeals(domain=domain, api_key=api_key)
+        self.leads = AsyncLeads(domain=domain, api_key=api_key)
+
+    async def aclose(self):
+        await asyncio.gather(self.contacts.aclose(), self.accounts.aclose(),
+                             self.deals.aclose(), self.leads.aclose())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -1,15 +1,59 @@
-import copy
 import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 
 import requests
+import urllib3.response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# only advertise br when the installed urllib3 can actually decode it;
+# probing its decoder registry avoids second-guessing which brotli package
+# a given urllib3 version supports
+_BR_SUPPORTED = 'br' in getattr(urllib3.response.HTTPResponse,
+                                'CONTENT_DECODERS', ())
+
+# compiled normalization loop, present only when the Cython extension was
+# built (the 'fast' extra)
+try:
+    from ._normalize import normalize_page as _normalize_page
+except ImportError:
+    _normalize_page = None
+
+# orjson parses bytes directly with a C parser; fall back to stdlib when it
+# is not installed
+_loads = orjson.loads if orjson else json.loads
 
 logger = logging.getLogger(__name__)
 
+# the API wants booleans as lowercase strings
+_BOOL_STR = {True: 'true', False: 'false'}
 
-class APIBase:
-    def __init__(self, resource_type, domain, api_key, resource_type_singular=None, default_params=None):
+
+class _APICore:
+    """Transport-independent half of the client: configuration, param
+    handling and normalization. APIBase adds the requests transport on top;
+    the async client in aio.py adds an httpx transport instead.
+    """
+
+    __slots__ = ('resource_type', 'resource_type_singular', 'domain',
+                 'api_key', 'concurrency', 'metadata_ttl', 'default_params',
+                 '_base_url', '_views_cache', '_etags',
+                 '_get_url_tmpl', '_default_params_qs')
+
+    def __init__(self, resource_type, domain, api_key, resource_type_singular=None, default_params=None, concurrency=8, metadata_ttl=300):
         self.resource_type = resource_type
         self.resource_type_singular = resource_type_singular
         # best guess is to remove last letter
@@ -17,9 +61,92 @@ class APIBase:
             self.resource_type_singular = self.resource_type[0:-1]
         self.domain = domain
         self.api_key = api_key
+        self.concurrency = concurrency
+        self.metadata_ttl = metadata_ttl
+        self._views_cache = None
+        # path -> (etag, parsed response) for conditional GETs
+        self._etags = {}
         self.default_params = default_params
         if not self.default_params:
             self.default_params = {}
+        self._base_url = f'https://{self.domain}.freshsales.io'
+        # precomputed pieces for the get-by-id hot path: URL template plus
+        # the default params encoded once
+        self._get_url_tmpl = f'{self._base_url}/{self.resource_type}/{{}}'
+        self._default_params_qs = urlencode(self.default_params)
+
+    def _build_params(self, params):
+        """Merge caller params into the default params for a request."""
+        # default_params only holds immutable values, so a shallow copy is
+        # enough and much cheaper than deepcopy
+        api_params = self.default_params.copy()
+        if params:
+            # drop unused (None) params and convert booleans to lowercase
+            # strings in a single pass
+            api_params.update(
+                (k, _BOOL_STR[v] if v.__class__ is bool else v)
+                for k, v in params.items() if v is not None)
+        return api_params
+
+    # container keys whose arrays get indexed by id for O(1) lookups in
+    # _normalize_batch
+    _INDEX_KEYS = ('users', 'contact_status', 'appointments', 'outcomes',
+                   'industry_types', 'sales_accounts', 'deal_stages',
+                   'lead_stages')
+
+    @staticmethod
+    def _build_index(res):
+        res['_index'] = {key: {o['id']: o for o in res[key]}
+                         for key in _APICore._INDEX_KEYS if key in res}
+
+    # (id key on the object, output key on the object, container index key)
+    # triples driving _normalize_batch; subclasses declare their own
+    _NORMALIZE_MAP = ()
+
+    def _normalize_batch(self, objs, container):
+        """
+        Attach related objects from the container to a whole page of objects,
+        driven by the class-level _NORMALIZE_MAP. E.g. contact object has an
+        owner_id and list of users is in the container. We can fetch the owner
+        object and attach it to the contact object which makes things easier
+        for the client. Batching resolves each index once per page instead of
+        once per object.
+        """
+        index = container['_index']
+        if _normalize_page is not None:
+            _normalize_page(objs, self._NORMALIZE_MAP, index)
+            return
+        for id_key, out_key, container_key in self._NORMALIZE_MAP:
+            idx = index.get(container_key)
+            if idx:
+                for obj in objs:
+                    if id_key in obj:
+                        obj[out_key] = idx.get(obj[id_key])
+            else:
+                for obj in objs:
+                    if id_key in obj:
+                        obj[out_key] = None
+
+
+class APIBase(_APICore):
+    __slots__ = ('_session',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # one session per instance so TCP+TLS connections are reused across
+        # calls instead of a fresh handshake per request
+        self._session = requests.Session()
+        self._session.headers['Authorization'] = f'Token token={self.api_key}'
+        # freshsales JSON compresses ~10x; requests/urllib3 decompress
+        # transparently, but only offer br when urllib3 can decode it
+        self._session.headers['Accept-Encoding'] = 'br, gzip' if _BR_SUPPORTED else 'gzip'
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 502, 503, 504])
+        )
+        self._session.mount('https://', adapter)
 
     def _get_generic(self, path, params=None):
         """Create a HTTP GET request.
@@ -31,72 +158,101 @@ class APIBase:
         Returns:
             A response from the request (dict).
         """
-        assert path is not None
-        assert path.startswith('/')
-        if not params:
-            params = {}
-        api_headers = {'Authorization': f'Token token={self.api_key}'}
-        api_params = copy.deepcopy(self.default_params)
-
-        for k in params:
-            # ignore all unused params
-            if not params[k] is None:
-                p = params[k]
-
-                # convert boolean to lowercase string
-                if isinstance(p, bool):
-                    p = str(p).lower()
-
-                api_params[k] = p
-
-        api_path = f'https://{self.domain}.freshsales.io{path}'
+        if not path.startswith('/'):
+            raise ValueError(f'path must start with "/": {path!r}')
+        api_params = self._build_params(params)
+        api_path = self._base_url + path
+        # conditional GET only applies to the /filters metadata endpoints:
+        # they are few and slow-changing, so the cache stays tiny, and a 304
+        # returning the cached object by reference is harmless there. Caching
+        # every param-less GET would retain per-id response bodies forever.
+        cacheable = path.endswith('/filters')
+        cached = self._etags.get(path) if cacheable else None
+        headers = {'If-None-Match': cached[0]} if cached else None
         logger.debug('calling get %s passing params %s', api_path, api_params)
-        response = requests.get(
+        response = self._session.get(
             url=api_path,
-            headers=api_headers,
-            params=api_params
+            params=api_params,
+            headers=headers
         )
+        if cached and response.status_code == 304:
+            return cached[1]
         # raise exception if not 200
         response.raise_for_status()
 
-        res = json.loads(response.text)
+        # response.content is raw bytes, so we skip the encoding detection
+        # that response.text would trigger
+        res = _loads(response.content)
 #        logger.debug('res = %s', res)
+        etag = response.headers.get('ETag')
+        if etag and cacheable:
+            self._etags[path] = (etag, res)
         return res
 
-    def _get_views(self):
-        return self._get_generic(path=f'/{self.resource_type}/filters')['filters']
-
-    @staticmethod
-    def _find_obj_by_id(objs, id):
-        for o in objs:
-            if o['id'] == id:
-                return o
-        return None
+    def _get_generic_stream(self, path, params=None):
+        """Like _get_generic but parses the response incrementally from the
+        raw byte stream, so the full response text is never held in memory.
 
-    def _normalize(self, obj, container):
+        Requires the optional ijson package.
         """
-        Every class should normalize it if it wants to do any normalization of the object.
-        E.g. contact object has an owner_id and list of users is in the container. We can fetch
-        the owner object and attach it to the contact object which makes things easier for the client
-        """
-        raise NotImplementedError('this should be overridden')
+        if not path.startswith('/'):
+            raise ValueError(f'path must start with "/": {path!r}')
+        if ijson is None:
+            raise RuntimeError('streaming requires the ijson package')
+        api_params = self._build_params(params)
+        api_path = self._base_url + path
+        logger.debug('calling streaming get %s passing params %s',
+                     api_path, api_params)
+        response = self._session.get(
+            url=api_path,
+            params=api_params,
+            stream=True
+        )
+        response.raise_for_status()
 
-    def _get_all_generator(self, view_id, limit=None):
+        # undo content-encoding so ijson sees plain JSON bytes
+        response.raw.decode_content = True
+        res = {}
+        for key, value in ijson.kvitems(response.raw, ''):
+            res[key] = value
+        return res
+
+    def _get_views(self):
+        # views are tenant-level metadata that changes rarely, so cache them
+        # for metadata_ttl seconds instead of paying a round-trip per call
+        if self._views_cache and time.monotonic() < self._views_cache[1]:
+            return self._views_cache[0]
+        views = self._get_generic(path=f'/{self.resource_type}/filters')['filters']
+        self._views_cache = (views, time.monotonic() + self.metadata_ttl)
+        return views
+
+    def _get_page(self, view_id, page):
+        # only pay for the timing syscalls when debug logging is enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            start_time = time.time()
+        res = self._get_generic(
+            path=f'/{self.resource_type}/view/{view_id}', params={'page': page})
+        if debug:
+            logger.debug('got page %s of %s in %s seconds',
+                         page, res['meta']['total_pages'], time.time()-start_time)
+        self._build_index(res)
+        return res
+
+    def _get_all_generator_stream(self, view_id, limit=None):
+        # pages are fetched serially here: the point of the streaming path
+        # is to bound memory, not to maximize throughput
         page = 1
         num = 0
         while True:
-            start_time = time.time()
-            params = {'page': page}
-            res = self._get_generic(
-                path=f'/{self.resource_type}/view/{view_id}', params=params)
+            res = self._get_generic_stream(
+                path=f'/{self.resource_type}/view/{view_id}',
+                params={'page': page})
+            self._build_index(res)
             total_pages = res['meta']['total_pages']
-            end_time = time.time()
-            logger.debug('got page %s of %s in %s seconds',
-                         page, total_pages, end_time-start_time)
-
             objs = res[self.resource_type]
+            self._normalize_batch(objs, container=res)
             for obj in objs:
-                self._normalize(obj=obj, container=res)
                 num = num + 1
                 if limit and num > limit:
                     return
@@ -106,16 +262,59 @@ class APIBase:
             if page > total_pages:
                 break
 
+    def _get_all_generator(self, view_id, limit=None):
+        # fetch page 1 synchronously to learn the total page count, then
+        # prefetch the remaining pages concurrently; futures are consumed in
+        # submission order so the original ordering is preserved
+        num = 0
+        res = self._get_page(view_id=view_id, page=1)
+        total_pages = res['meta']['total_pages']
+        executor = None
+        pending = []
+        if total_pages > 1:
+            executor = ThreadPoolExecutor(max_workers=self.concurrency)
+            pending = [executor.submit(self._get_page, view_id, page)
+                       for page in range(2, total_pages + 1)]
+        try:
+            while True:
+                objs = res[self.resource_type]
+                self._normalize_batch(objs, container=res)
+                for obj in objs:
+                    num = num + 1
+                    if limit and num > limit:
+                        return
+                    yield obj
+
+                if not pending:
+                    break
+                res = pending.pop(0).result()
+        finally:
+            for f in pending:
+                f.cancel()
+            if executor:
+                executor.shutdown(wait=False)
+
     def _get_by_id(self, id):
-        res = self._get_generic(path=f'/{self.resource_type}/{id}')
+        # bypass _get_generic: users call get(id) in tight loops, so the URL
+        # comes from the precomputed template and the default params are
+        # passed as an already-encoded query string
+        response = self._session.get(
+            url=self._get_url_tmpl.format(id),
+            params=self._default_params_qs
+        )
+        response.raise_for_status()
+        res = _loads(response.content)
+        self._build_index(res)
         v = res[self.resource_type_singular]
-        self._normalize(obj=v, container=res)
+        self._normalize_batch([v], container=res)
         return v
 
     def get_views(self):
         return self._get_views()
 
-    def get_all_generator(self, view_id, limit=None):
+    def get_all_generator(self, view_id, limit=None, stream=False):
+        if stream:
+            return self._get_all_generator_stream(view_id=view_id, limit=limit)
         return self._get_all_generator(view_id=view_id, limit=limit)
 
     def get_all(self, view_id, limit=None):
@@ -125,123 +324,117 @@ class APIBase:
         return self._get_by_id(id=id)
 
 
-class Contacts(APIBase):
+# the resource mixins carry everything specific to one resource type
+# (default params, normalization map) so the sync classes below and the
+# async ones in aio.py share a single definition
+
+
+class _ContactsMixin:
+    __slots__ = ()
+
+    _NORMALIZE_MAP = (
+        ('owner_id', 'owner', 'users'),
+        ('contact_status_id', 'contact_status', 'contact_status'),
+    )
+
     def __init__(self, domain, api_key):
         default_params = {'include': 'sales_accounts,appointments,owner,contact_status',
                           'sort': 'updated_at', 'sort_type': 'desc'}
         super().__init__(domain=domain, api_key=api_key,
                          resource_type='contacts', default_params=default_params)
 
-    def _normalize(self, obj, container):
-        users = []
-        if 'users' in container:
-            users = container['users']
-        contact_statuses = []
-        if 'contact_status' in container:
-            contact_statuses = container['contact_status']
-        appointments = []
-        if 'appointments' in container:
-            appointments = container['appointments']
-        outcomes = []
-        if 'outcomes' in container:
-            outcomes = container['outcomes']
-
-        if 'owner_id' in obj:
-            owner = APIBase._find_obj_by_id(objs=users, id=obj['owner_id'])
-            obj['owner'] = owner
-        if 'contact_status_id' in obj:
-            contact_status = APIBase._find_obj_by_id(objs=contact_statuses, id=obj['contact_status_id'])
-            obj['contact_status'] = contact_status
-        if 'appointment_ids' in obj:
+    def _normalize_batch(self, objs, container):
+        super()._normalize_batch(objs, container=container)
+        # appointments carry a nested outcome, which the table-driven
+        # normalization cannot express
+        index = container['_index']
+        appointments = index.get('appointments', {})
+        outcomes = index.get('outcomes', {})
+        for obj in objs:
+            if 'appointment_ids' not in obj:
+                continue
             res = []
             for appointment_id in obj['appointment_ids']:
-                ap = APIBase._find_obj_by_id(objs=appointments, id=appointment_id)
-                outcome = APIBase._find_obj_by_id(objs=outcomes, id=ap['outcome_id'])
-                ap['outcome'] = outcome
+                ap = appointments.get(appointment_id)
+                # appointments may be absent when not part of include
+                if ap is None:
+                    continue
+                ap['outcome'] = outcomes.get(ap.get('outcome_id'))
                 res.append(ap)
             obj['appointments'] = res
 
 
-    def get_activities(self, id):
-        return self._get_generic(f'/contacts/{id}/activities')['activities']
+class _AccountsMixin:
+    __slots__ = ()
 
-    def get_appointments(self, id):
-        return self._get_generic(f'/contacts/{id}/appointments')['appointments']
+    _NORMALIZE_MAP = (
+        ('owner_id', 'owner', 'users'),
+        ('industry_type_id', 'industry_type', 'industry_types'),
+    )
 
-
-class Accounts(APIBase):
     def __init__(self, domain, api_key):
         default_params = {'include': 'appointments,owner,industry_type',
                           'sort': 'updated_at', 'sort_type': 'desc'}
         super().__init__(domain=domain, api_key=api_key,
                          resource_type='sales_accounts', default_params=default_params)
 
-    def _normalize(self, obj, container):
-        users = []
-        if 'users' in container:
-            users = container['users']
-        if 'owner_id' in obj:
-            owner = APIBase._find_obj_by_id(objs=users, id=obj['owner_id'])
-            obj['owner'] = owner
-        industry_types = []
-        if 'industry_types' in container:
-            industry_types = container['industry_types']
-        if 'industry_type_id' in obj:
-            industry_type = APIBase._find_obj_by_id(objs=industry_types, id=obj['industry_type_id'])
-            obj['industry_type'] = industry_type
-
-
-class Deals(APIBase):
+
+class _DealsMixin:
+    __slots__ = ()
+
+    _NORMALIZE_MAP = (
+        ('owner_id', 'owner', 'users'),
+        ('sales_account_id', 'sales_account', 'sales_accounts'),
+        ('deal_stage_id', 'deal_stage', 'deal_stages'),
+    )
+
     def __init__(self, domain, api_key):
         default_params = {'include': 'sales_account,appointments,owner,deal_stage',
                           'sort': 'updated_at', 'sort_type': 'desc'}
         super().__init__(domain=domain, api_key=api_key,
                          resource_type='deals', default_params=default_params)
 
-    def _normalize(self, obj, container):
-        users = []
-        sales_accounts = []
-        deal_stages = []
-        if 'users' in container:
-            users = container['users']
-        if 'sales_accounts' in container:
-            sales_accounts = container['sales_accounts']
-        if 'deal_stages' in container:
-            deal_stages = container['deal_stages']
-        if 'owner_id' in obj:
-            owner = APIBase._find_obj_by_id(objs=users, id=obj['owner_id'])
-            obj['owner'] = owner
-        if 'sales_account_id' in obj:
-            sales_account = APIBase._find_obj_by_id(
-                objs=sales_accounts, id=obj['sales_account_id'])
-            obj['sales_account'] = sales_account
-        if 'deal_stage_id' in obj:
-            deal_stage = APIBase._find_obj_by_id(
-                objs=deal_stages, id=obj['deal_stage_id'])
-            obj['deal_stage'] = deal_stage
-
-class Leads(APIBase):
+
+class _LeadsMixin:
+    __slots__ = ()
+
+    _NORMALIZE_MAP = (
+        ('owner_id', 'owner', 'users'),
+        ('lead_stage_id', 'lead_stage', 'lead_stages'),
+    )
+
     def __init__(self, domain, api_key):
         default_params = {'include': 'sales_account,appointments,owner,lead_stage',
                           'sort': 'updated_at', 'sort_type': 'desc'}
         super().__init__(domain=domain, api_key=api_key,
                          resource_type='leads', default_params=default_params)
 
-    def _normalize(self, obj, container):
-        users = []
-        lead_stage = []
-        if 'users' in container:
-            users = container['users']
-        if 'owner_id' in obj:
-            owner = APIBase._find_obj_by_id(objs=users, id=obj['owner_id'])
-            obj['owner'] = owner
-        if 'lead_stages' in container:
-            lead_stages = container['lead_stages']
-        if 'lead_stage_id' in obj:
-            lead_stage = APIBase._find_obj_by_id(objs=lead_stages, id=obj['lead_stage_id'])
-            obj['lead_stage'] = lead_stage
+
+class Contacts(_ContactsMixin, APIBase):
+    __slots__ = ()
+
+    def get_activities(self, id):
+        return self._get_generic(f'/contacts/{id}/activities')['activities']
+
+    def get_appointments(self, id):
+        return self._get_generic(f'/contacts/{id}/appointments')['appointments']
+
+
+class Accounts(_AccountsMixin, APIBase):
+    __slots__ = ()
+
+
+class Deals(_DealsMixin, APIBase):
+    __slots__ = ()
+
+
+class Leads(_LeadsMixin, APIBase):
+    __slots__ = ()
+
 
 class FreshsalesSDK:
+    __slots__ = ('contacts', 'accounts', 'deals', 'leads')
+
     def __init__(self, domain, api_key):
         self.contacts = Contacts(domain=domain, api_key=api_key)
         self.accounts = Accounts(domain=domain, api_key=api_key)
@@ -1,5 +1,13 @@
 import setuptools
 
+# the compiled normalization loop is optional; the SDK falls back to pure
+# Python when Cython is not around to build it
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(['freshsalessdk/_normalize.pyx'])
+except ImportError:
+    ext_modules = []
+
 with open('README.md', 'r') as f:
     long_description = f.read()
 
@@ -16,6 +24,14 @@ setuptools.setup(
     url='https://github.com/fylein/freshsales-sdk-py',
     packages=setuptools.find_packages(),
     install_requires=['requests'],
+    extras_require={
+        'async': ['httpx[http2]'],
+        'brotli': ['brotli'],
+        'fast': ['Cython'],
+        'orjson': ['orjson'],
+        'stream': ['ijson'],
+    },
+    ext_modules=ext_modules,
     classifiers=[
         'Topic :: Internet :: WWW/HTTP',
         'Intended Audience :: Developers',
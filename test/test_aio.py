@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import os
+import re
+
+import pytest
+
+from freshsalessdk.aio import AsyncFreshsalesSDK
+
+from .test_contacts import assert_contact_well_formed
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def afs():
+    assert os.getenv('FS_DOMAIN') is not None, 'FS_DOMAIN is not set'
+    assert os.getenv('FS_API_KEY') is not None, 'FS_API_KEY is not set'
+    return AsyncFreshsalesSDK(
+        domain=os.getenv('FS_DOMAIN'),
+        api_key=os.getenv('FS_API_KEY')
+    )
+
+
+async def _get_contacts_view_id(afs):
+    views = await afs.contacts.get_views()
+    for v in views:
+        if re.match('all', v['name'].lower()):
+            return v['id']
+    assert False, 'Could not find a contacts view'
+    return None
+
+
+def test_async_contacts_get_views(afs):
+    async def run():
+        async with afs:
+            views = await afs.contacts.get_views()
+            assert views
+    asyncio.run(run())
+
+
+def test_async_contacts_get_all_generator(afs):
+    async def run():
+        async with afs:
+            view_id = await _get_contacts_view_id(afs)
+            async for contact in afs.contacts.get_all_generator(view_id=view_id, limit=10):
+                assert_contact_well_formed(contact)
+    asyncio.run(run())
+
+
+def test_async_contacts_get(afs):
+    async def run():
+        async with afs:
+            view_id = await _get_contacts_view_id(afs)
+            contacts = await afs.contacts.get_all(view_id=view_id, limit=1)
+            assert_contact_well_formed(contacts[0])
+            contact = await afs.contacts.get(id=contacts[0]['id'])
+            assert_contact_well_formed(contact)
+    asyncio.run(run())
@@ -1,6 +1,7 @@
 import logging
 import re
 import pytest
+from freshsalessdk import freshsalessdk
 from .common import dict_read, dict_compare_keys
 
 logger = logging.getLogger(__name__)
@@ -26,10 +27,17 @@ def test_contacts_get_views(fs):
     views = fs.contacts.get_views()
     assert views
 
-def test_contacts_get_all_generator(fs, contacts_view_id):
-    for contact in fs.contacts.get_all_generator(view_id=contacts_view_id, limit=10):
+@pytest.mark.parametrize('stream', [False, True])
+def test_contacts_get_all_generator(fs, contacts_view_id, stream):
+    for contact in fs.contacts.get_all_generator(view_id=contacts_view_id, limit=10, stream=stream):
         assert_contact_well_formed(contact)
 
+def test_contacts_stream_requires_ijson(monkeypatch):
+    monkeypatch.setattr(freshsalessdk, 'ijson', None)
+    contacts = freshsalessdk.Contacts(domain='dummy', api_key='dummy')
+    with pytest.raises(RuntimeError):
+        next(contacts.get_all_generator(view_id=0, stream=True))
+
 def test_contacts_get(fs, contacts_view_id):
     contact1 = next(fs.contacts.get_all_generator(view_id=contacts_view_id, limit=1))
     assert_contact_well_formed(contact1)